@@ -1,13 +1,11 @@
 from __future__ import annotations
 
 import asyncio
-from decimal import Decimal
 from typing import AsyncIterator
 
-from fastapi import APIRouter, Depends, Response, status
-from fastapi.concurrency import run_in_threadpool
+from fastapi import APIRouter, Depends, Header, Response, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
 from app.schemas.game import (
@@ -25,70 +23,85 @@ from app.services.game_service import GameService
 
 router = APIRouter(prefix="/rooms", tags=["rooms"])
 
+KEEPALIVE_SECONDS = 15.0
 
-def _serialize_player(player) -> PlayerRead:
-    payout = player.payout
+
+def _player_dict(player) -> dict:
+    payout_cents = player.payout_cents
     payout_value: float | None
-    if payout is None:
+    if payout_cents is None:
         payout_value = None
     else:
-        payout_value = float(payout)
-
-    return PlayerRead(
-        id=player.id,
-        display_name=player.display_name,
-        submitted=bool(player.submitted_at),
-        allocation_a=player.allocation_a,
-        allocation_b=player.allocation_b,
-        payout=payout_value,
-    )
+        payout_value = payout_cents / 100
+
+    return {
+        "id": player.id,
+        "display_name": player.display_name,
+        "submitted": bool(player.submitted_at),
+        "allocation_a": player.allocation_a,
+        "allocation_b": player.allocation_b,
+        "payout": payout_value,
+    }
+
+
+def _serialize_player(player_dict: dict) -> PlayerRead:
+    # Built from a row we just read or wrote, so validation is skipped.
+    return PlayerRead.model_construct(**player_dict)
+
+
+def _room_dict(room) -> dict:
+    return {
+        "code": room.code,
+        "max_players": room.max_players,
+        "status": room.status,
+        "created_at": room.created_at,
+    }
 
 
 @router.post("", response_model=RoomRead, status_code=status.HTTP_201_CREATED)
-async def create_room(payload: RoomCreate, db: Session = Depends(get_db)):
+async def create_room(payload: RoomCreate, db: AsyncSession = Depends(get_db)):
     service = GameService(db)
-    room = await run_in_threadpool(service.create_room, payload)
-    return RoomRead.model_validate(room)
+    room = await service.create_room(payload)
+    return RoomRead.model_construct(**_room_dict(room))
 
 
 @router.get("/{code}", response_model=RoomDetail)
-async def room_detail(code: str, db: Session = Depends(get_db)):
+async def room_detail(code: str, db: AsyncSession = Depends(get_db)):
     service = GameService(db)
-    room = await run_in_threadpool(service.get_room, code)
-    players = await run_in_threadpool(service.list_players, code)
-    return RoomDetail(
-        **RoomRead.model_validate(room).model_dump(),
-        players=[_serialize_player(p) for p in players],
+    room = await service.get_room_with_players(code)
+    return RoomDetail.model_construct(
+        **_room_dict(room),
+        players=[_serialize_player(_player_dict(p)) for p in room.players],
     )
 
 
 @router.post("/{code}/join", response_model=PlayerRead)
-async def join_room(code: str, payload: PlayerCreate, db: Session = Depends(get_db)):
+async def join_room(code: str, payload: PlayerCreate, db: AsyncSession = Depends(get_db)):
     service = GameService(db)
-    player = await run_in_threadpool(service.join_room, code, payload.display_name)
-    player_data = _serialize_player(player)
+    player = await service.join_room(code, payload.display_name)
+    player_dict = _player_dict(player)
     event = RoomEvent(
         type="player_joined",
         room_code=code,
-        payload={"player": player_data.model_dump()},
+        payload={"player": player_dict},
     )
-    await broker.publish(code, event.model_dump())
-    return player_data
+    await broker.publish(code, event)
+    return _serialize_player(player_dict)
 
 
 @router.post("/{code}/submit", response_model=PlayerRead)
-async def submit_allocation(code: str, payload: SubmitAllocation, db: Session = Depends(get_db)):
+async def submit_allocation(code: str, payload: SubmitAllocation, db: AsyncSession = Depends(get_db)):
     service = GameService(db)
-    player, result = await run_in_threadpool(
-        service.submit_allocation, code, payload.player_id, payload.asset_a, payload.asset_b
+    player, result = await service.submit_allocation(
+        code, payload.player_id, payload.asset_a, payload.asset_b
     )
-    player_data = _serialize_player(player)
+    player_dict = _player_dict(player)
     submission_event = RoomEvent(
         type="player_submitted",
         room_code=code,
-        payload={"player": player_data.model_dump()},
+        payload={"player": player_dict},
     )
-    await broker.publish(code, submission_event.model_dump())
+    await broker.publish(code, submission_event)
 
     if isinstance(result, GameResult):
         result_event = RoomEvent(
@@ -96,29 +109,32 @@ async def submit_allocation(code: str, payload: SubmitAllocation, db: Session =
             room_code=code,
             payload=result.model_dump(),
         )
-        await broker.publish(code, result_event.model_dump())
+        await broker.publish(code, result_event)
 
-    return player_data
+    return _serialize_player(player_dict)
 
 
 @router.delete("/{code}/players/{player_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def leave_room(code: str, player_id: str, db: Session = Depends(get_db)):
+async def leave_room(code: str, player_id: str, db: AsyncSession = Depends(get_db)):
     service = GameService(db)
-    player, room = await run_in_threadpool(service.leave_room, code, player_id)
+    player, room = await service.leave_room(code, player_id)
     event = RoomEvent(
         type="player_left",
         room_code=code,
         payload={"player_id": player.id, "status": room.status},
     )
-    await broker.publish(code, event.model_dump())
+    await broker.publish(code, event)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.get("/{code}/events")
-async def room_events(code: str):
-    async def event_stream() -> AsyncIterator[str]:
-        async for message in broker.subscribe(code):
-            yield f"data: {message}\n\n"
+async def room_events(code: str, last_event_id: str | None = Header(default=None)):
+    # EventSource sends Last-Event-ID on reconnect; fresh connections get no replay.
+    resume_from = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+
+    async def event_stream() -> AsyncIterator[bytes]:
+        async for frame in broker.subscribe(code, heartbeat=KEEPALIVE_SECONDS, last_event_id=resume_from):
+            yield frame
             await asyncio.sleep(0)
 
     headers = {
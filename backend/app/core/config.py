@@ -11,6 +11,10 @@ class Settings:
         default_db = "sqlite:///./dev.db"
         self.database_url = os.getenv("DATABASE_URL", default_db)
         self.test_database_url = os.getenv("TEST_DATABASE_URL")
+        default_origins = "http://localhost:5173,https://smu-investment-game-phi.vercel.app"
+        self.cors_origins = [
+            origin.strip() for origin in os.getenv("CORS_ORIGINS", default_origins).split(",") if origin.strip()
+        ]
         self.app_name = "SMU Investment Game"
 
 
@@ -20,3 +24,8 @@ def get_settings() -> Settings:
 
 
 settings = get_settings()
+
+DATABASE_URL = settings.database_url
+TEST_DATABASE_URL = settings.test_database_url
+APP_NAME = settings.app_name
+CORS_ORIGINS = settings.cors_origins
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy import Connection, inspect
+
+from app.db.session import Base, engine
+from app.models import game  # noqa: F401  registers the tables on Base.metadata
+
+
+def _migrate_payout_to_cents(conn: Connection) -> None:
+    # Databases created before integer settlement store dollars in players.payout NUMERIC(10,2).
+    columns = {column["name"] for column in inspect(conn).get_columns("players")}
+    if "payout" not in columns:
+        return
+    if "payout_cents" not in columns:
+        conn.exec_driver_sql("ALTER TABLE players ADD COLUMN payout_cents INTEGER")
+    conn.exec_driver_sql(
+        "UPDATE players SET payout_cents = CAST(ROUND(payout * 100) AS INTEGER) "
+        "WHERE payout IS NOT NULL AND payout_cents IS NULL"
+    )
+    conn.exec_driver_sql("ALTER TABLE players DROP COLUMN payout")
+
+
+def _create_missing_indexes(conn: Connection) -> None:
+    # create_all only emits indexes alongside new tables, so tables that already existed
+    # (e.g. before ix_players_room_joined / ix_players_room_submitted) are backfilled here.
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn)
+
+
+def upgrade_schema(conn: Connection) -> None:
+    """Create missing tables, then apply in-place changes that create_all cannot make."""
+    Base.metadata.create_all(conn)
+    _migrate_payout_to_cents(conn)
+    _create_missing_indexes(conn)
+
+
+async def init_db() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(upgrade_schema)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(init_db())
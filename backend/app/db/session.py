@@ -1,48 +1,74 @@
 from __future__ import annotations
 
-from contextlib import contextmanager
-from typing import Iterator
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
 
-from app.core.config import settings
+from app.core.config import DATABASE_URL, TEST_DATABASE_URL
 
 
 class Base(DeclarativeBase):
     pass
 
 
-def _build_engine(url: str):
-    connect_args = {}
+def _async_url(url: str) -> str:
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+def _set_sqlite_pragmas(dbapi_conn, _connection_record) -> None:
+    # WAL lets readers proceed while a submission is being written.
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-20000")
+    cursor.close()
+
+
+def _build_engine(url: str) -> AsyncEngine:
+    pool_args = {}
+    if ":memory:" in url:
+        # Every connection to :memory: is a separate database, so share a single one.
+        pool_args.update(poolclass=StaticPool)
+    else:
+        # Explicit because aiosqlite would default to NullPool for file databases.
+        pool_args.update(poolclass=AsyncAdaptedQueuePool, pool_size=20, max_overflow=40)
+    engine = create_async_engine(_async_url(url), pool_pre_ping=True, pool_recycle=1800, **pool_args)
     if url.startswith("sqlite"):
-        connect_args["check_same_thread"] = False
-    return create_engine(url, future=True, connect_args=connect_args, pool_pre_ping=True, pool_recycle=1800,)
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return engine
 
 
-def get_engine(testing: bool = False):
-    if testing and settings.test_database_url:
-        return _build_engine(settings.test_database_url)
-    return _build_engine(settings.database_url)
+def get_engine(testing: bool = False) -> AsyncEngine:
+    if testing and TEST_DATABASE_URL:
+        return _build_engine(TEST_DATABASE_URL)
+    return _build_engine(DATABASE_URL)
 
 
 engine = get_engine()
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 
-@contextmanager
-def db_session() -> Iterator[sessionmaker]:
+@asynccontextmanager
+async def db_session() -> AsyncIterator[AsyncSession]:
     session = SessionLocal()
     try:
         yield session
-        session.commit()
+        await session.commit()
     except Exception:
-        session.rollback()
+        await session.rollback()
         raise
     finally:
-        session.close()
+        await session.close()
 
 
-def get_db() -> Iterator[sessionmaker]:
-    with db_session() as session:
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with db_session() as session:
         yield session
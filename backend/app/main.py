@@ -2,26 +2,36 @@ from __future__ import annotations
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.types import Receive, Scope, Send
 
 from app.api.routers import rooms
-from app.core.config import settings
-from app.db.session import Base, engine
+from app.core.config import APP_NAME, CORS_ORIGINS
 
-app = FastAPI(title=settings.app_name)
+
+class JSONGZipMiddleware(GZipMiddleware):
+    """GZip that leaves SSE streams alone, since compression would buffer events."""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].endswith("/events"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+app = FastAPI(title=APP_NAME)
+
+app.add_middleware(JSONGZipMiddleware, minimum_size=1000)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=CORS_ORIGINS,
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["content-type", "last-event-id"],
+    max_age=86400,
 )
 
 
-@app.on_event("startup")
-def on_startup() -> None:
-    Base.metadata.create_all(bind=engine)
-
-
 @app.get("/health")
 def healthcheck() -> dict[str, str]:
     return {"status": "ok"}
@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import CheckConstraint, DateTime, ForeignKey, Integer, Numeric, String, func
+from sqlalchemy import CheckConstraint, DateTime, ForeignKey, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.session import Base
@@ -33,7 +33,7 @@ class Player(Base):
     display_name: Mapped[str] = mapped_column(String(64))
     allocation_a: Mapped[int | None] = mapped_column(Integer)
     allocation_b: Mapped[int | None] = mapped_column(Integer)
-    payout: Mapped[float | None] = mapped_column(Numeric(10, 2))
+    payout_cents: Mapped[int | None] = mapped_column(Integer)
     submitted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     joined_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
@@ -41,4 +41,6 @@ class Player(Base):
 
     __table_args__ = (
         CheckConstraint("allocation_a + allocation_b = 100", name="allocation_total",),
+        Index("ix_players_room_joined", "room_code", "joined_at"),
+        Index("ix_players_room_submitted", "room_code", "submitted_at"),
     )
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Literal
+from typing import Literal, TypedDict
 
 from pydantic import BaseModel, Field
 
@@ -55,12 +55,17 @@ class GameResult(BaseModel):
     players: list[PlayerPayout]
 
 
-class RoomEvent(BaseModel):
-    type: Literal[
-        "player_joined",
-        "player_submitted",
-        "player_left",
-        "results_ready",
-    ]
+RoomEventType = Literal[
+    "player_joined",
+    "player_submitted",
+    "player_left",
+    "results_ready",
+]
+
+
+class RoomEvent(TypedDict):
+    """Server-built SSE payload; a plain dict so it is encoded without model validation."""
+
+    type: RoomEventType
     room_code: str
     payload: dict
@@ -1,40 +1,129 @@
 from __future__ import annotations
 
 import asyncio
-import json
-from collections import defaultdict
-from typing import AsyncIterator, Dict, Set
+from collections import defaultdict, deque
+from typing import AsyncIterator, Deque, Dict, List, Tuple
+
+import orjson
+
+from app.schemas.game import RoomEvent
+
+SUBSCRIBER_QUEUE_SIZE = 64
+REPLAY_WINDOW = 16
+# How long a room's replay history outlives its last subscriber.
+REPLAY_TTL = 60.0
+# Events published to a room within this window are sent as one JSON-array frame.
+BATCH_WINDOW = 0.005
+
+# Pushed to an evicted subscriber so its stream terminates.
+_EOF = object()
+# SSE comment line; EventSource ignores it but it keeps idle proxies from closing the stream.
+KEEPALIVE_FRAME = b":ping\n\n"
 
 
 class RoomEventBroker:
     """In-memory broker that multiplexes SSE streams per room."""
 
-    def __init__(self) -> None:
-        self._subscribers: Dict[str, Set[asyncio.Queue[str]]] = defaultdict(set)
-        self._lock = asyncio.Lock()
+    def __init__(self, replay_ttl: float = REPLAY_TTL) -> None:
+        self._replay_ttl = replay_ttl
+        # Subscriber tuples are replaced, never mutated, so publish can read them without locking.
+        self._subscribers: Dict[str, Tuple[asyncio.Queue[object], ...]] = {}
+        self._history: Dict[str, Deque[Tuple[int, bytes]]] = {}
+        self._sequence: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._pending: Dict[str, List[bytes]] = defaultdict(list)
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+        self._prune_handles: Dict[str, asyncio.TimerHandle] = {}
 
-    async def publish(self, room_code: str, event: dict) -> None:
-        message = json.dumps(event)
-        async with self._lock:
-            queues = list(self._subscribers.get(room_code, set()))
-        for queue in queues:
-            await queue.put(message)
+    async def publish(self, room_code: str, event: RoomEvent) -> None:
+        self._pending[room_code].append(orjson.dumps(event))
+        if room_code not in self._flush_handles:
+            loop = asyncio.get_running_loop()
+            self._flush_handles[room_code] = loop.call_later(BATCH_WINDOW, self._flush, room_code)
+
+    def _flush(self, room_code: str) -> None:
+        self._flush_handles.pop(room_code, None)
+        pending = self._pending.pop(room_code, None)
+        if not pending:
+            return
+        event_id = self._sequence.get(room_code, 0) + 1
+        self._sequence[room_code] = event_id
+        # Encode the SSE frame once and share the same bytes with every subscriber.
+        message = b"id: %d\ndata: [" % event_id + b",".join(pending) + b"]\n\n"
+        self._history.setdefault(room_code, deque(maxlen=REPLAY_WINDOW)).append((event_id, message))
+        to_evict: List[asyncio.Queue[object]] = []
+        subscribers = self._subscribers.get(room_code, ())
+        for queue in subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                to_evict.append(queue)
+        if to_evict:
+            self._evict(room_code, to_evict)
+        if not self._subscribers.get(room_code):
+            self._schedule_prune(room_code)
 
-    async def subscribe(self, room_code: str) -> AsyncIterator[str]:
-        queue: asyncio.Queue[str] = asyncio.Queue()
-        async with self._lock:
-            self._subscribers[room_code].add(queue)
+    async def subscribe(
+        self, room_code: str, heartbeat: float | None = None, last_event_id: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """Stream frames for a room; frames after ``last_event_id`` are replayed first on reconnect."""
+        queue: asyncio.Queue[object] = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        async with self._locks[room_code]:
+            handle = self._prune_handles.pop(room_code, None)
+            if handle is not None:
+                handle.cancel()
+            if last_event_id is not None and last_event_id <= self._sequence.get(room_code, 0):
+                for event_id, message in self._history.get(room_code, ()):
+                    if event_id > last_event_id:
+                        queue.put_nowait(message)
+            self._subscribers[room_code] = (*self._subscribers.get(room_code, ()), queue)
         try:
             while True:
-                payload = await queue.get()
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE_FRAME
+                    continue
+                if payload is _EOF:
+                    break
                 yield payload
         finally:
-            async with self._lock:
-                subscribers = self._subscribers.get(room_code)
-                if subscribers and queue in subscribers:
-                    subscribers.remove(queue)
-                if subscribers == set():
-                    self._subscribers.pop(room_code, None)
+            await self._remove(room_code, queue)
+
+    def _evict(self, room_code: str, queues: List[asyncio.Queue[object]]) -> None:
+        for queue in queues:
+            self._discard(room_code, queue)
+            # Make room for the sentinel; the slow consumer is dropped anyway.
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(_EOF)
+
+    async def _remove(self, room_code: str, queue: asyncio.Queue[object]) -> None:
+        async with self._locks[room_code]:
+            self._discard(room_code, queue)
+
+    def _discard(self, room_code: str, queue: asyncio.Queue[object]) -> None:
+        # No awaits here, so the tuple swap is atomic with respect to the event loop.
+        remaining = tuple(q for q in self._subscribers.get(room_code, ()) if q is not queue)
+        if remaining:
+            self._subscribers[room_code] = remaining
+        else:
+            self._subscribers.pop(room_code, None)
+            self._schedule_prune(room_code)
+
+    def _schedule_prune(self, room_code: str) -> None:
+        if room_code not in self._prune_handles:
+            loop = asyncio.get_running_loop()
+            self._prune_handles[room_code] = loop.call_later(self._replay_ttl, self._prune, room_code)
+
+    def _prune(self, room_code: str) -> None:
+        self._prune_handles.pop(room_code, None)
+        lock = self._locks.get(room_code)
+        if room_code in self._subscribers or (lock is not None and lock.locked()):
+            return
+        self._history.pop(room_code, None)
+        self._sequence.pop(room_code, None)
+        self._locks.pop(room_code, None)
 
 
 broker = RoomEventBroker()
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
 import random
 import string
 from typing import Sequence
 
+import numpy as np
 from fastapi import HTTPException, status
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.models.game import Player, Room
 from app.schemas.game import GameResult, PlayerPayout, RoomCreate
@@ -16,166 +18,201 @@ STATUS_WAITING = "waiting"
 STATUS_READY = "ready"
 STATUS_COMPLETED = "completed"
 
+ROOM_CODE_ATTEMPTS = 5
+
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
 
 def _generate_room_code(length: int = 6) -> str:
     alphabet = string.ascii_uppercase + string.digits
     return "".join(random.choice(alphabet) for _ in range(length))
 
 
+def _headcount():
+    # Correlates against the rooms row targeted by the enclosing UPDATE.
+    return select(func.count(Player.id)).where(Player.room_code == Room.code).scalar_subquery()
+
+
 class GameService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_room(self, payload: RoomCreate) -> Room:
-        code = self._unique_room_code()
-        room = Room(code=code, max_players=payload.max_players, status=STATUS_WAITING)
-        self.db.add(room)
-        self.db.commit()
-        self.db.refresh(room)
+    async def create_room(self, payload: RoomCreate) -> Room:
+        insert = _DIALECT_INSERTS[self.db.get_bind().dialect.name]
+        for _ in range(ROOM_CODE_ATTEMPTS):
+            stmt = (
+                insert(Room)
+                .values(code=_generate_room_code(), max_players=payload.max_players, status=STATUS_WAITING)
+                .on_conflict_do_nothing()
+                .returning(Room)
+            )
+            room = (await self.db.scalars(stmt)).first()
+            if room is not None:
+                await self.db.commit()
+                return room
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Could not allocate a room code")
+
+    async def get_room(self, code: str) -> Room:
+        room = await self.db.get(Room, code)
+        if not room:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Room not found")
         return room
 
-    def get_room(self, code: str) -> Room:
-        room = self.db.get(Room, code)
+    async def get_room_with_players(self, code: str) -> Room:
+        room = (
+            await self.db.execute(select(Room).where(Room.code == code).options(selectinload(Room.players)))
+        ).scalar_one_or_none()
         if not room:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Room not found")
         return room
 
-    def join_room(self, code: str, display_name: str) -> Player:
-        room = self.get_room(code)
-        current_players = self._count_players(code)
+    async def join_room(self, code: str, display_name: str) -> Player:
+        room = await self.get_room(code)
+        current_players = await self._count_players(code)
         if current_players >= room.max_players:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Room is full")
 
         player = Player(room_code=room.code, display_name=display_name)
         self.db.add(player)
-        self.db.commit()
-        self.db.refresh(player)
-
-        if current_players + 1 == room.max_players:
-            room.status = STATUS_READY
-            self.db.add(room)
-            self.db.commit()
+        await self.db.flush()
+        await self.db.execute(
+            update(Room)
+            .where(Room.code == code, Room.status == STATUS_WAITING, _headcount() == Room.max_players)
+            .values(status=STATUS_READY)
+            .execution_options(synchronize_session="fetch")
+        )
+        await self.db.commit()
+        await self.db.refresh(player)
 
         return player
 
-    def submit_allocation(
+    async def submit_allocation(
         self, code: str, player_id: str, asset_a: int, asset_b: int
     ) -> tuple[Player, GameResult | None]:
         if asset_a + asset_b != 100:
             raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="A + B must equal 100")
 
-        player = self.db.get(Player, player_id)
+        # Lock the room row so concurrent final submissions settle one after another.
+        room = (
+            await self.db.execute(select(Room).where(Room.code == code).with_for_update())
+        ).scalar_one_or_none()
+        if not room:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Room not found")
+
+        player = await self.db.get(Player, player_id)
         if not player or player.room_code != code:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
 
-        room = self.get_room(code)
-        total_players = self._count_players(code)
-        if total_players < 2:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Need at least two players")
-
         if player.submitted_at is not None:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Allocation already submitted")
 
         player.allocation_a = asset_a
         player.allocation_b = asset_b
-        player.submitted_at = datetime.now(timezone.utc)
+        player.submitted_at = func.now()
         self.db.add(player)
-        self.db.commit()
-        self.db.refresh(player)
+        await self.db.flush()
+
+        total_players, submitted_players = await self._player_counts(code)
+        if total_players < 2:
+            await self.db.rollback()
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Need at least two players")
 
         result: GameResult | None = None
-        if self._all_players_submitted(room):
-            result = self._finalize_room(room)
+        if total_players >= room.max_players and submitted_players == total_players:
+            result = await self._finalize_room(code)
+
+        await self.db.commit()
+        await self.db.refresh(player, attribute_names=["submitted_at"])
 
         return player, result
 
-    def leave_room(self, code: str, player_id: str) -> tuple[Player, Room]:
-        player = self.db.get(Player, player_id)
+    async def leave_room(self, code: str, player_id: str) -> tuple[Player, Room]:
+        player = await self.db.get(Player, player_id)
         if not player or player.room_code != code:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
 
-        room = self.get_room(code)
+        room = await self.get_room(code)
         if room.status == STATUS_COMPLETED:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Game already completed")
 
-        self.db.delete(player)
-        self.db.commit()
-
-        remaining = self._count_players(code)
-        if remaining < room.max_players and room.status == STATUS_READY:
-            room.status = STATUS_WAITING
-            self.db.add(room)
-            self.db.commit()
+        await self.db.delete(player)
+        await self.db.flush()
+        await self.db.execute(
+            update(Room)
+            .where(Room.code == code, Room.status == STATUS_READY, _headcount() < Room.max_players)
+            .values(status=STATUS_WAITING)
+            .execution_options(synchronize_session="fetch")
+        )
+        await self.db.commit()
 
         return player, room
 
-    def _finalize_room(self, room: Room) -> GameResult:
-        players = (
-            self.db.execute(
-                select(Player).where(Player.room_code == room.code).order_by(Player.joined_at)
-            )
-            .scalars()
-            .all()
+    async def _finalize_room(self, code: str) -> GameResult | None:
+        # Only the submitter that flips the status settles; the caller commits.
+        completed = await self.db.scalar(
+            update(Room)
+            .where(Room.code == code, Room.status != STATUS_COMPLETED)
+            .values(status=STATUS_COMPLETED)
+            .returning(Room.code)
+            .execution_options(synchronize_session=False)
         )
-        result = self.calculate_payouts(players)
-        for payout in result.players:
-            player = next(p for p in players if p.id == payout.player_id)
-            player.payout = payout.payout
+        if completed is None:
+            return None
+
+        room = (
+            await self.db.execute(
+                select(Room)
+                .where(Room.code == code)
+                .options(selectinload(Room.players))
+                .execution_options(populate_existing=True)
+            )
+        ).scalar_one()
+        total_b, payout_cents = self._settle_cents(room.players)
+        for player, cents in zip(room.players, payout_cents):
+            player.payout_cents = cents
             self.db.add(player)
-        room.status = STATUS_COMPLETED
-        self.db.add(room)
-        self.db.commit()
-        return result
-
-    def list_players(self, code: str) -> list[Player]:
-        self.get_room(code)
-        players = (
-            self.db.execute(select(Player).where(Player.room_code == code).order_by(Player.joined_at))
-            .scalars()
-            .all()
-        )
-        return players
-
-    def _all_players_submitted(self, room: Room) -> bool:
-        total = self._count_players(room.code)
-        if total < room.max_players or total < 2:
-            return False
-        submitted = self.db.scalar(
-            select(func.count())
-            .select_from(Player)
-            .where(Player.room_code == room.code, Player.submitted_at.is_not(None))
-        )
-        return submitted == total
+        return self._result_from_cents(room.players, total_b, payout_cents)
 
-    def _count_players(self, code: str) -> int:
-        return self.db.scalar(select(func.count()).select_from(Player).where(Player.room_code == code)) or 0
+    async def _player_counts(self, code: str) -> tuple[int, int]:
+        total, submitted = (
+            await self.db.execute(
+                select(func.count(Player.id), func.count(Player.submitted_at)).where(Player.room_code == code)
+            )
+        ).one()
+        return total, submitted
 
-    def _unique_room_code(self) -> str:
-        while True:
-            code = _generate_room_code()
-            if not self.db.get(Room, code):
-                return code
+    async def _count_players(self, code: str) -> int:
+        return (
+            await self.db.scalar(select(func.count()).select_from(Player).where(Player.room_code == code))
+        ) or 0
 
     @staticmethod
     def calculate_payouts(players: Sequence[Player]) -> GameResult:
+        total_b, payout_cents = GameService._settle_cents(players)
+        return GameService._result_from_cents(players, total_b, payout_cents)
+
+    @staticmethod
+    def _settle_cents(players: Sequence[Player]) -> tuple[int, list[int]]:
         if not players:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No players to settle")
         if any(p.allocation_a is None or p.allocation_b is None for p in players):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing allocations")
 
-        total_b = sum(int(p.allocation_b or 0) for p in players)
-        boosted_pool = round(total_b * 1.5, 2)
-        share = boosted_pool / len(players)
-
-        payouts: list[PlayerPayout] = []
-        for player in players:
-            total = round((player.allocation_a or 0) + share, 2)
-            payouts.append(
-                PlayerPayout(
-                    player_id=player.id,
-                    display_name=player.display_name,
-                    payout=total,
-                )
-            )
+        count = len(players)
+        alloc_a = np.fromiter((p.allocation_a for p in players), dtype=np.int64, count=count)
+        alloc_b = np.fromiter((p.allocation_b for p in players), dtype=np.int64, count=count)
+        total_b = int(alloc_b.sum())
+        share_cents, remainder = divmod(total_b * 150, count)
+
+        payout_cents = alloc_a * 100 + share_cents
+        # Hand leftover cents to the earliest players so payouts sum exactly to the pool.
+        payout_cents[:remainder] += 1
+        return total_b, payout_cents.tolist()
 
-        return GameResult(total_b_pool=float(total_b), boosted_pool=boosted_pool, players=payouts)
+    @staticmethod
+    def _result_from_cents(players: Sequence[Player], total_b: int, payout_cents: list[int]) -> GameResult:
+        payouts = [
+            PlayerPayout(player_id=player.id, display_name=player.display_name, payout=cents / 100)
+            for player, cents in zip(players, payout_cents)
+        ]
+        return GameResult(total_b_pool=float(total_b), boosted_pool=total_b * 150 / 100, players=payouts)
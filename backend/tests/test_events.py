@@ -0,0 +1,125 @@
+import asyncio
+
+from app.services.events import BATCH_WINDOW, SUBSCRIBER_QUEUE_SIZE, RoomEventBroker
+
+
+def event(n: int):
+    return {"type": "player_left", "room_code": "ROOM01", "payload": {"n": n}}
+
+
+async def settle():
+    await asyncio.sleep(BATCH_WINDOW * 4)
+
+
+def test_full_queue_evicts_subscriber_and_ends_stream():
+    async def scenario():
+        broker = RoomEventBroker()
+        stream = broker.subscribe("ROOM01")
+        reader = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        await broker.publish("ROOM01", event(0))
+        await settle()
+        await reader
+        assert "ROOM01" in broker._subscribers
+
+        # Never read again: each flush adds one frame until the queue overflows.
+        for n in range(SUBSCRIBER_QUEUE_SIZE + 1):
+            await broker.publish("ROOM01", event(n))
+            await settle()
+
+        assert "ROOM01" not in broker._subscribers
+        remaining = [frame async for frame in stream]
+        assert remaining == []
+
+    asyncio.run(scenario())
+
+
+def test_closing_stream_removes_subscriber():
+    async def scenario():
+        broker = RoomEventBroker()
+        stream = broker.subscribe("ROOM01")
+        reader = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        assert len(broker._subscribers["ROOM01"]) == 1
+        reader.cancel()
+        await asyncio.sleep(0)
+        await stream.aclose()
+        assert "ROOM01" not in broker._subscribers
+
+    asyncio.run(scenario())
+
+
+def test_fresh_subscriber_gets_no_replay():
+    async def scenario():
+        broker = RoomEventBroker()
+        await broker.publish("ROOM01", event(1))
+        await settle()
+
+        stream = broker.subscribe("ROOM01", heartbeat=BATCH_WINDOW)
+        assert await stream.__anext__() == b":ping\n\n"
+        await stream.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_reconnect_replays_frames_after_last_event_id():
+    async def scenario():
+        broker = RoomEventBroker()
+        for n in range(3):
+            await broker.publish("ROOM01", event(n))
+            await settle()
+
+        stream = broker.subscribe("ROOM01", last_event_id=1)
+        assert await stream.__anext__() == b'id: 2\ndata: [{"type":"player_left","room_code":"ROOM01","payload":{"n":1}}]\n\n'
+        assert (await stream.__anext__()).startswith(b"id: 3\n")
+        await stream.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_idle_room_history_is_pruned():
+    async def scenario():
+        broker = RoomEventBroker(replay_ttl=BATCH_WINDOW)
+        for n in range(100):
+            await broker.publish(f"ROOM{n}", event(n))
+        await settle()
+        await settle()
+
+        assert broker._history == {}
+        assert broker._sequence == {}
+        assert dict(broker._locks) == {}
+
+    asyncio.run(scenario())
+
+
+def test_publishes_within_batch_window_share_one_frame():
+    async def scenario():
+        broker = RoomEventBroker()
+        stream = broker.subscribe("ROOM01")
+        reader = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        await broker.publish("ROOM01", event(1))
+        await broker.publish("ROOM01", event(2))
+
+        frame = await reader
+        assert frame.startswith(b"id: 1\ndata: [")
+        assert frame.count(b'"type"') == 2
+        assert frame.endswith(b"]\n\n")
+        await stream.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_single_publish_is_a_one_element_array():
+    async def scenario():
+        broker = RoomEventBroker()
+        stream = broker.subscribe("ROOM01")
+        reader = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        await broker.publish("ROOM01", event(1))
+
+        frame = await reader
+        assert frame == b'id: 1\ndata: [{"type":"player_left","room_code":"ROOM01","payload":{"n":1}}]\n\n'
+        await stream.aclose()
+
+    asyncio.run(scenario())
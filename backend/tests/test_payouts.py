@@ -49,3 +49,26 @@ def test_rounding_handles_decimals():
     assert payouts["p1"] == 120.0
     assert payouts["p2"] == 170.0
     assert payouts["p3"] == 110.0
+
+
+def test_leftover_cents_go_to_earliest_players():
+    players = [make_player(1, 99, 1), make_player(2, 100, 0), make_player(3, 100, 0), make_player(4, 100, 0)]
+
+    result = GameService.calculate_payouts(players)
+
+    assert result.total_b_pool == 1
+    assert result.boosted_pool == 1.5
+    payouts = [p.payout for p in result.players]
+    assert payouts == [99.38, 100.38, 100.37, 100.37]
+    assert round(sum(payouts), 2) == 400.5
+
+
+def test_settlement_cents_are_exact_integers():
+    players = [make_player(1, 99, 1), make_player(2, 100, 0), make_player(3, 100, 0), make_player(4, 100, 0)]
+
+    total_b, payout_cents = GameService._settle_cents(players)
+
+    assert total_b == 1
+    assert payout_cents == [9938, 10038, 10037, 10037]
+    assert all(type(cents) is int for cents in payout_cents)
+    assert sum(payout_cents) == 40050
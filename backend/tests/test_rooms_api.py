@@ -0,0 +1,95 @@
+import asyncio
+import re
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.db.init_db import upgrade_schema
+from app.db.session import _build_engine, get_db
+from app.main import app
+
+TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?([+-]\d{2}:\d{2}|Z)?$")
+
+
+def run_against_temp_db(tmp_path, scenario):
+    async def runner():
+        engine = _build_engine(f"sqlite:///{tmp_path / 'api.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(upgrade_schema)
+        sessions = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+        async def override_db():
+            async with sessions() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await scenario(client)
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            await engine.dispose()
+
+    asyncio.run(runner())
+
+
+def test_room_and_player_response_shapes(tmp_path):
+    async def scenario(client):
+        created = await client.post("/rooms", json={"max_players": 2})
+        assert created.status_code == 201
+        room = created.json()
+        assert list(room) == ["code", "max_players", "status", "created_at"]
+        assert re.fullmatch(r"[A-Z0-9]{6}", room["code"])
+        assert room["max_players"] == 2
+        assert room["status"] == "waiting"
+        assert TIMESTAMP.match(room["created_at"])
+        code = room["code"]
+
+        joined = await client.post(f"/rooms/{code}/join", json={"display_name": "Ann"})
+        assert joined.status_code == 200
+        ann = joined.json()
+        assert ann == {
+            "id": ann["id"],
+            "display_name": "Ann",
+            "submitted": False,
+            "allocation_a": None,
+            "allocation_b": None,
+            "payout": None,
+        }
+        ben = (await client.post(f"/rooms/{code}/join", json={"display_name": "Ben"})).json()
+
+        detail = (await client.get(f"/rooms/{code}")).json()
+        assert list(detail) == ["code", "max_players", "status", "created_at", "players"]
+        assert {key: detail[key] for key in room} == {**room, "status": "ready"}
+        assert sorted(detail["players"], key=lambda p: p["display_name"]) == [ann, ben]
+
+    run_against_temp_db(tmp_path, scenario)
+
+
+def test_settled_payouts_are_floats(tmp_path):
+    async def scenario(client):
+        code = (await client.post("/rooms", json={"max_players": 2})).json()["code"]
+        ann = (await client.post(f"/rooms/{code}/join", json={"display_name": "Ann"})).json()
+        ben = (await client.post(f"/rooms/{code}/join", json={"display_name": "Ben"})).json()
+
+        submitted = await client.post(
+            f"/rooms/{code}/submit", json={"player_id": ann["id"], "asset_a": 30, "asset_b": 70}
+        )
+        assert submitted.json() == {
+            "id": ann["id"],
+            "display_name": "Ann",
+            "submitted": True,
+            "allocation_a": 30,
+            "allocation_b": 70,
+            "payout": None,
+        }
+        await client.post(f"/rooms/{code}/submit", json={"player_id": ben["id"], "asset_a": 100, "asset_b": 0})
+
+        detail = (await client.get(f"/rooms/{code}")).json()
+        assert detail["status"] == "completed"
+        payouts = {p["display_name"]: p["payout"] for p in detail["players"]}
+        assert payouts == {"Ann": 82.5, "Ben": 152.5}
+        assert all(isinstance(value, float) for value in payouts.values())
+
+    run_against_temp_db(tmp_path, scenario)
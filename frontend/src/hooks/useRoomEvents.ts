@@ -16,15 +16,18 @@ export function useRoomEvents(
 
     source.onmessage = (message) => {
       try {
-        const payload = JSON.parse(message.data) as RoomEvent;
-        onEvent(payload);
+        // Events published in quick succession arrive batched as one array.
+        const payload = JSON.parse(message.data) as RoomEvent | RoomEvent[];
+        const events = Array.isArray(payload) ? payload : [payload];
+        events.forEach(onEvent);
       } catch (error) {
         console.error("Failed to parse event", error);
       }
     };
 
     source.onerror = () => {
-      source.close();
+      // Leave the source open so the browser reconnects and resumes via Last-Event-ID.
+      console.warn("Room event stream interrupted; reconnecting");
     };
 
     return () => {